@@ -1,17 +1,806 @@
+# onnx, onnxruntime and onnxmltools are imported inside the functions that use
+# them, so --help and argument errors don't pay for loading them
+from __future__ import annotations
+
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import os
 import sys
 import argparse
-import onnx
-from onnxmltools.utils.float16_converter import convert_float_to_float16
+import hashlib
+import tempfile
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import onnx
+    import onnxruntime as ort
+
+TARGET_OPSET = 19
+MB = 1 << 20
+WRITE_BUFFER_SIZE = 16 << 20
+# Protobuf cannot serialize messages of 2 GiB or more; larger models keep
+# their weights in an external data file
+MAX_PROTOBUF_BYTES = 1 << 31
+# Intermediate models are cached here rather than next to the inputs, so they
+# don't end up in the repository or the Docker build context
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "face-validation-service"
+)
+# Tolerance for FP16 outputs against FP32 before falling back to mixed precision.
+# The relative part is scaled by each output channel's range, see
+# outputs_within_tolerance.
+FP16_RTOL = 1e-2
+FP16_ATOL = 1e-4
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+# Only compute-bound ops are quantized; Q/DQ pairs around elementwise ops cost
+# more than they save and block Conv fusions
+OP_TYPES_TO_QUANTIZE = ["Conv", "MatMul", "Gemm"]
+# Ops without FP16 kernels on some execution providers stay in FP32, on top of
+# the converter's default block list
+FP16_OP_BLOCK_LIST = [
+    "Attention",
+    "LayerNormalization",
+    "SkipLayerNormalization",
+]
+
+
+class ImageCalibrationDataReader:
+    """
+    Feed preprocessed images from a folder to the static quantization calibrator.
+
+    ONNX Runtime recognizes calibration readers by their get_next method, so
+    this class does not need to subclass CalibrationDataReader.
+
+    Images are preprocessed the same way as the Go service does before
+    inference: plain resize to the model input size, RGB, scaled to [0, 1]
+    and laid out as NCHW.
+
+    Args:
+        calibration_dir (str): Folder containing calibration images.
+        model_path (str): Path to the ONNX model, used to read the input name and size.
+    """
+
+    def __init__(self, calibration_dir: str, model_path: str) -> None:
+        calibration_dir = Path(calibration_dir)
+        if not calibration_dir.is_dir():
+            raise FileNotFoundError(
+                f"Calibration directory not found: {calibration_dir}"
+            )
+
+        self.image_paths = sorted(
+            path
+            for path in calibration_dir.iterdir()
+            if path.suffix.lower() in IMAGE_EXTENSIONS
+        )
+        if not self.image_paths:
+            raise ValueError(f"No calibration images found in: {calibration_dir}")
+
+        import onnxruntime as ort
+
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        if not all(isinstance(dim, int) for dim in model_input.shape[2:]):
+            raise ValueError(
+                f"Model input '{model_input.name}' has a dynamic size "
+                f"{model_input.shape}; export the model with a fixed input size"
+            )
+        self.input_height, self.input_width = model_input.shape[2:]
+        self.rewind()
+
+    def preprocess(self, image_path: Path) -> np.ndarray:
+        import cv2
+        import numpy as np
+
+        image = cv2.imread(str(image_path))
+        if image is None:
+            raise ValueError(f"Unable to read calibration image: {image_path}")
+
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image = cv2.resize(
+            image, (self.input_width, self.input_height), interpolation=cv2.INTER_LINEAR
+        )
+        image = image.astype(np.float32) / 255.0
+        return np.expand_dims(image.transpose(2, 0, 1), axis=0)
+
+    def get_next(self) -> dict | None:
+        image_path = next(self._iterator, None)
+        if image_path is None:
+            return None
+        return {self.input_name: self.preprocess(image_path)}
+
+    def rewind(self) -> None:
+        self._iterator = iter(self.image_paths)
+
+
+def model_size_bytes(model_path: str) -> int:
+    """
+    Get the on-disk size of a model, including its external data files.
+
+    Args:
+        model_path (str): Path to the ONNX model.
+
+    Returns:
+        int: Size of the model file plus every external data file it uses.
+    """
+    import onnx
+    from onnx.external_data_helper import ExternalDataInfo, uses_external_data
+
+    model_path = Path(model_path)
+    model = onnx.load(str(model_path), load_external_data=False)
+    locations = {
+        ExternalDataInfo(tensor).location
+        for tensor in model.graph.initializer
+        if uses_external_data(tensor)
+    }
+    return model_path.stat().st_size + sum(
+        (model_path.parent / location).stat().st_size for location in locations
+    )
+
+
+def is_large_model(model_path: str) -> bool:
+    """
+    Check whether a model is too large to be handled as a single protobuf.
+
+    Args:
+        model_path (str): Path to the ONNX model.
+
+    Returns:
+        bool: True if the model and its weights reach the protobuf limit.
+    """
+    return model_size_bytes(model_path) >= MAX_PROTOBUF_BYTES
+
+
+def save_model(model: onnx.ModelProto, output_path: str) -> None:
+    """
+    Save an ONNX model, moving weights to an external data file when needed.
+
+    Models below the 2 GiB protobuf limit are saved as a single
+    self-contained file, so they can still be embedded by the service, and
+    written through a large buffer. Larger models store their tensors in a
+    single `<stem>.data` file next to the model.
+
+    The model is written to a temporary file in the same folder and moved
+    into place last, so an interrupted run never leaves a truncated model
+    at output_path.
+
+    Args:
+        model (onnx.ModelProto): Model to save.
+        output_path (str): Path where the model will be saved.
+    """
+    import onnx
+
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        if model.ByteSize() < MAX_PROTOBUF_BYTES:
+            with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                onnx.save_model(model, f)
+        else:
+            location = f"{output_path.stem}.data"
+            # External data is appended to, so drop any file left by a previous run
+            (output_path.parent / location).unlink(missing_ok=True)
+            onnx.save_model(
+                model,
+                str(tmp_path),
+                save_as_external_data=True,
+                all_tensors_to_one_file=True,
+                location=location,
+                size_threshold=1024,
+                convert_attribute=False,
+            )
+            # Saving moves the tensor data out of the proto; read it back so
+            # the caller's model is left usable
+            onnx.external_data_helper.load_external_data_for_model(
+                model, str(output_path.parent)
+            )
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def model_cache_path(model_path: str, suffix: str) -> Path:
+    """
+    Get the cache path for a model derived from the given input model.
+
+    The name is keyed on the input's resolved path, modification time and
+    size, plus the suffix, so a changed input or different conversion
+    settings never reuse a stale entry.
+
+    Args:
+        model_path (str): Path to the input ONNX model.
+        suffix (str): Describes the derived model, e.g. "opset19".
+
+    Returns:
+        Path: Path of the cached model inside CACHE_DIR.
+    """
+    model_path = Path(model_path)
+    stat = model_path.stat()
+    cache_key = hashlib.blake2b(
+        f"{model_path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}:{suffix}".encode()
+    ).hexdigest()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return CACHE_DIR / f"{model_path.stem}_{suffix}_{cache_key[:16]}.onnx"
+
+
+def optimize_onnx_model(
+    model_path: str,
+    optimized_path: str,
+    level: ort.GraphOptimizationLevel | None = None,
+) -> None:
+    """
+    Run ONNX Runtime graph optimizations offline and save the optimized model.
+
+    Only basic optimizations (constant folding, Conv+BatchNorm fusion,
+    redundant node elimination) are used by default, since they keep the
+    graph in standard ONNX ops that later conversion steps understand.
+
+    Like save_model, the optimized model is written to a temporary file and
+    moved into place once complete.
+
+    Args:
+        model_path (str): Path to the input ONNX model.
+        optimized_path (str): Path where the optimized model will be saved.
+        level (ort.GraphOptimizationLevel | None): Optimization level to apply,
+            defaults to ORT_ENABLE_BASIC.
+    """
+    import onnxruntime as ort
+
+    if level is None:
+        level = ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+
+    optimized_path = Path(optimized_path)
+    tmp_path = optimized_path.with_name(f".{optimized_path.name}.{os.getpid()}.tmp")
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = level
+    session_options.optimized_model_filepath = str(tmp_path)
+    if is_large_model(model_path):
+        session_options.add_session_config_entry(
+            "session.optimized_model_external_initializers_file_name",
+            f"{optimized_path.stem}.data",
+        )
+        session_options.add_session_config_entry(
+            "session.optimized_model_external_initializers_min_size_in_bytes",
+            "1024",
+        )
+    try:
+        ort.InferenceSession(
+            model_path, session_options, providers=["CPUExecutionProvider"]
+        )
+        os.replace(tmp_path, optimized_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def preprocess_model(model_path: str, output_path: str) -> None:
+    """
+    Prepare a model for quantization by annotating tensor shapes.
+
+    This mirrors the shape inference steps of quant_pre_process. As there,
+    symbolic shape inference is skipped for models over the protobuf limit,
+    which only get ONNX shape inference run from file.
+
+    Args:
+        model_path (str): Path to the model to preprocess.
+        output_path (str): Path where the preprocessed model will be saved.
+            Must be in the same folder as model_path so external data resolves.
+    """
+    import onnx
+    from onnxruntime.tools.symbolic_shape_infer import SymbolicShapeInference
+
+    print("Preprocessing model for quantization...")
+    if is_large_model(model_path):
+        onnx.shape_inference.infer_shapes_path(model_path, output_path)
+        return
+
+    model = SymbolicShapeInference.infer_shapes(onnx.load(model_path), auto_merge=True)
+    save_model(onnx.shape_inference.infer_shapes(model), output_path)
+
+
+def has_unchanged_op_schemas(
+    model: onnx.ModelProto, current_opset: int, target_opset: int
+) -> bool:
+    """
+    Check whether every op in the model keeps its schema up to the target opset.
+
+    When no op used by the model changed between the two opsets, upgrading
+    only requires bumping the opset version; no nodes need rewriting.
+
+    Args:
+        model (onnx.ModelProto): Model to check.
+        current_opset (int): Current default-domain opset of the model.
+        target_opset (int): Opset version to convert to.
+
+    Returns:
+        bool: True if the opset version can be bumped in place.
+    """
+    import onnx
+
+    for node in model.graph.node:
+        if node.domain not in ("", "ai.onnx"):
+            continue
+        # Subgraphs would need the same check recursively; leave them to the
+        # version converter
+        if any(
+            attr.type in (onnx.AttributeProto.GRAPH, onnx.AttributeProto.GRAPHS)
+            for attr in node.attribute
+        ):
+            return False
+        try:
+            schema = onnx.defs.get_schema(node.op_type, target_opset, "")
+        except onnx.defs.SchemaError:
+            return False
+        if schema.since_version > current_opset:
+            return False
+    return True
+
+
+def update_model_opset(model_path: str, target_opset: int = TARGET_OPSET) -> str:
+    """
+    Convert an ONNX model to the given opset version.
+
+    Per-channel QDQ quantization needs opset 13 or newer and FP8 needs
+    opset 19, so models are brought up to a common opset before
+    quantization. Models already at or above the target opset are left
+    untouched. Converted models are cached in CACHE_DIR, see
+    model_cache_path, so repeated runs reuse them.
+
+    Args:
+        model_path (str): Path to the input ONNX model.
+        target_opset (int): Opset version to convert to.
+
+    Returns:
+        str: Path to the model to use.
+    """
+    import onnx
+    from onnx import version_converter
+
+    model_path = Path(model_path)
+    updated_path = model_cache_path(str(model_path), f"opset{target_opset}")
+    if updated_path.is_file():
+        print(f"Using cached opset {target_opset} model: {updated_path}")
+        return str(updated_path)
+
+    # Only the opset is needed to decide whether to convert, so external
+    # weights are read once conversion is known to be needed
+    model = onnx.load(str(model_path), load_external_data=False)
+    current_opset = next(
+        opset.version for opset in model.opset_import if opset.domain in ("", "ai.onnx")
+    )
+    if current_opset >= target_opset:
+        print(f"Model already at opset {current_opset}, skipping conversion")
+        return str(model_path)
+
+    print(f"Updating model opset from {current_opset} to {target_opset}...")
+    # The cached model lives in another folder, so it can't share the input's
+    # external data file
+    onnx.external_data_helper.load_external_data_for_model(
+        model, str(model_path.parent)
+    )
+    if has_unchanged_op_schemas(model, current_opset, target_opset):
+        # Patch the version in place instead of letting the version converter
+        # rewrite and copy the whole graph
+        for opset in model.opset_import:
+            if opset.domain in ("", "ai.onnx"):
+                opset.version = target_opset
+        save_model(model, str(updated_path))
+
+        # Check the saved file so external data resolves against the model's
+        # folder, and don't leave an invalid model behind as a cache entry
+        try:
+            onnx.checker.check_model(str(updated_path))
+        except onnx.checker.ValidationError:
+            updated_path.unlink(missing_ok=True)
+            raise
+    else:
+        converted_model = version_converter.convert_version(model, target_opset)
+        save_model(converted_model, str(updated_path))
+
+    return str(updated_path)
+
+
+def quantize_fp8(
+    model_input: str,
+    output_path: str,
+    calibration_reader: ImageCalibrationDataReader,
+    use_external_data_format: bool = False,
+) -> None:
+    """
+    Quantize weights and activations to FP8 (E4M3) using static quantization.
+
+    FP8 quantization does not support per-channel scales, so a single scale
+    is used per tensor.
+
+    Args:
+        model_input (str): Path to a model at opset 19 or newer.
+        output_path (str): Path where the quantized model will be saved.
+        calibration_reader (ImageCalibrationDataReader): Source of calibration inputs.
+        use_external_data_format (bool): Save weights to an external data file,
+            needed for models over 2 GiB.
+    """
+    from onnxruntime.quantization import (
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    quantize_static(
+        model_input=model_input,
+        model_output=output_path,
+        calibration_data_reader=calibration_reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=False,
+        op_types_to_quantize=OP_TYPES_TO_QUANTIZE,
+        activation_type=QuantType.QFLOAT8E4M3FN,
+        weight_type=QuantType.QFLOAT8E4M3FN,
+        calibrate_method=CalibrationMethod.Distribution,
+        use_external_data_format=use_external_data_format,
+    )
+
+
+def quantize_onnx_model(
+    input_path: str,
+    output_path: str,
+    calibration_dir: str,
+    per_channel: bool = True,
+    reduce_range: bool = True,
+    dtype: str = "int8",
+) -> None:
+    """
+    Quantize an ONNX model to INT8 or FP8 using static quantization.
+
+    Activation scales are computed once from the calibration images and
+    stored in the model, so no per-inference range computation is needed.
+
+    Args:
+        input_path (str): Path to the input ONNX model.
+        output_path (str): Path where the quantized model will be saved.
+        calibration_dir (str): Folder containing calibration images.
+        per_channel (bool): Quantize weights per output channel (INT8 only).
+        reduce_range (bool): Quantize weights to 7 bits. Avoids saturation of
+            the int8 kernels on CPUs without VNNI when per_channel is enabled.
+        dtype (str): Target type, either "int8" or "fp8".
+    """
+    from onnxruntime.quantization import (
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
 
-def convert_float16(input_path: str, output_path: str) -> None:
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+
+    if not input_path.is_file():
+        raise FileNotFoundError(f"Input model not found: {input_path}")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    updated_model_path = Path(update_model_opset(str(input_path)))
+
+    # Keep the optimized graph around so repeated quantization runs only
+    # re-optimize when the source model changes
+    optimized_model_path = model_cache_path(str(updated_model_path), "ort_opt")
+    if optimized_model_path.is_file():
+        print(f"Using cached optimized model: {optimized_model_path}")
+    else:
+        print("Optimizing model graph...")
+        optimize_onnx_model(str(updated_model_path), str(optimized_model_path))
+
+    calibration_reader = ImageCalibrationDataReader(
+        calibration_dir, str(optimized_model_path)
+    )
+
+    # quantize_static rewrites an in-memory ModelProto to point at external data
+    # in a temporary folder it deletes, so hand it a saved copy instead. It sits
+    # next to the optimized model so that model's external data still resolves.
+    preprocessed_path = optimized_model_path.with_name(
+        f"{optimized_model_path.stem}_preprocessed.{os.getpid()}.onnx"
+    )
+    large_model = is_large_model(str(optimized_model_path))
+    try:
+        preprocess_model(str(optimized_model_path), str(preprocessed_path))
+
+        print(f"Quantizing model to {dtype.upper()}...")
+        if dtype == "fp8":
+            quantize_fp8(
+                str(preprocessed_path),
+                str(output_path),
+                calibration_reader,
+                use_external_data_format=large_model,
+            )
+        else:
+            quantize_static(
+                model_input=str(preprocessed_path),
+                model_output=str(output_path),
+                calibration_data_reader=calibration_reader,
+                quant_format=QuantFormat.QDQ,
+                per_channel=per_channel,
+                op_types_to_quantize=OP_TYPES_TO_QUANTIZE,
+                reduce_range=per_channel and reduce_range,
+                activation_type=QuantType.QInt8,
+                weight_type=QuantType.QInt8,
+                calibrate_method=CalibrationMethod.Entropy,
+                use_external_data_format=large_model,
+                extra_options={
+                    "ActivationSymmetric": True,
+                    "CalibMovingAverage": True,
+                    # Quantized outputs would also wrap the Add/Mul consumers
+                    # of a Conv in Q/DQ; leave them to the next Conv's input
+                    "OpTypesToExcludeOutputQuantization": OP_TYPES_TO_QUANTIZE,
+                },
+            )
+    finally:
+        preprocessed_path.unlink(missing_ok=True)
+
+    original_bytes = model_size_bytes(str(input_path))
+    quantized_bytes = model_size_bytes(str(output_path))
+
+    print(f"\nQuantization Results:")
+    print(f"Model quantized and saved to: {output_path}")
+    print(f"Original model size: {original_bytes / MB:.2f} MB")
+    print(f"{dtype.upper()} model size: {quantized_bytes / MB:.2f} MB")
+    print(f"Size reduction: {100 - quantized_bytes * 100 // original_bytes}%")
+
+
+def build_trt_int8_engine(
+    onnx_path: str, engine_path: str, calibrator_data_dir: str
+) -> None:
+    """
+    Build a serialized TensorRT INT8 engine from an FP32 ONNX model.
+
+    INT8 scales come from entropy calibration on the images in
+    calibrator_data_dir. FP16 is enabled too, so layers without an INT8
+    implementation fall back to FP16 instead of FP32. The calibration cache
+    is written next to the engine and reused on later builds. Its name
+    includes a hash of the model and the calibration images, so changing
+    either recalibrates instead of reusing stale scales.
+
+    Requires the optional `tensorrt` and `pycuda` packages.
+
+    Args:
+        onnx_path (str): Path to the input ONNX model.
+        engine_path (str): Path where the TensorRT engine will be saved.
+        calibrator_data_dir (str): Folder containing calibration images.
+    """
+    import numpy as np
+
+    try:
+        import pycuda.autoinit  # noqa: F401
+        import pycuda.driver as cuda
+        import tensorrt as trt
+    except ImportError as e:
+        raise ImportError(
+            "The TensorRT backend requires the tensorrt and pycuda packages"
+        ) from e
+
+    class EntropyCalibrator(trt.IInt8EntropyCalibrator2):
+        def __init__(self, reader: ImageCalibrationDataReader, cache_path: Path):
+            trt.IInt8EntropyCalibrator2.__init__(self)
+            self.reader = reader
+            self.cache_path = cache_path
+            self.device_input = None
+
+        def get_batch_size(self) -> int:
+            return 1
+
+        def get_batch(self, names: list[str]) -> list[int] | None:
+            batch = self.reader.get_next()
+            if batch is None:
+                return None
+
+            data = np.ascontiguousarray(batch[self.reader.input_name])
+            if self.device_input is None:
+                self.device_input = cuda.mem_alloc(data.nbytes)
+            cuda.memcpy_htod(self.device_input, data)
+            return [int(self.device_input)]
+
+        def read_calibration_cache(self) -> bytes | None:
+            if self.cache_path.is_file():
+                return self.cache_path.read_bytes()
+            return None
+
+        def write_calibration_cache(self, cache: bytes) -> None:
+            self.cache_path.write_bytes(cache)
+
+    onnx_path = Path(onnx_path)
+    engine_path = Path(engine_path)
+
+    if not onnx_path.is_file():
+        raise FileNotFoundError(f"Input model not found: {onnx_path}")
+
+    engine_path.parent.mkdir(parents=True, exist_ok=True)
+
+    print("Building TensorRT INT8 engine...")
+
+    logger = trt.Logger(trt.Logger.WARNING)
+    builder = trt.Builder(logger)
+    network = builder.create_network(
+        1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH)
+    )
+    parser = trt.OnnxParser(network, logger)
+    if not parser.parse_from_file(str(onnx_path)):
+        errors = "\n".join(str(parser.get_error(i)) for i in range(parser.num_errors))
+        raise RuntimeError(f"Failed to parse ONNX model:\n{errors}")
+
+    reader = ImageCalibrationDataReader(calibrator_data_dir, str(onnx_path))
+    cache_key = hashlib.blake2b()
+    with open(onnx_path, "rb") as f:
+        for chunk in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+            cache_key.update(chunk)
+    for image_path in reader.image_paths:
+        cache_key.update(f"{image_path.name}:{image_path.stat().st_mtime_ns}".encode())
+    calibrator = EntropyCalibrator(
+        reader,
+        engine_path.with_name(f"{engine_path.stem}_{cache_key.hexdigest()[:16]}.cache"),
+    )
+    config = builder.create_builder_config()
+    config.set_flag(trt.BuilderFlag.INT8)
+    config.set_flag(trt.BuilderFlag.FP16)
+    config.int8_calibrator = calibrator
+
+    serialized_engine = builder.build_serialized_network(network, config)
+    if serialized_engine is None:
+        raise RuntimeError("TensorRT engine build failed")
+    engine_path.write_bytes(serialized_engine)
+
+    original_bytes = model_size_bytes(str(onnx_path))
+    engine_bytes = engine_path.stat().st_size
+
+    print(f"\nTensorRT Build Results:")
+    print(f"Engine built and saved to: {engine_path}")
+    print(f"Original model size: {original_bytes / MB:.2f} MB")
+    print(f"INT8 engine size: {engine_bytes / MB:.2f} MB")
+
+
+def run_model(model: onnx.ModelProto, feed: dict) -> list:
+    """
+    Run an in-memory ONNX model on CPU, casting float inputs to the model's
+    float type. Inputs of other types are passed through unchanged.
+
+    Models over the protobuf limit cannot be serialized in memory, so they
+    are saved with external data to a temporary folder and run from there.
+
+    Args:
+        model (onnx.ModelProto): Model to run.
+        feed (dict): Input arrays keyed by input name.
+
+    Returns:
+        list: Model outputs as float32 arrays.
+    """
+    import numpy as np
+    import onnxruntime as ort
+
+    if model.ByteSize() < MAX_PROTOBUF_BYTES:
+        session = ort.InferenceSession(
+            model.SerializeToString(), providers=["CPUExecutionProvider"]
+        )
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = Path(tmp_dir) / "model.onnx"
+            save_model(model, str(model_path))
+            session = ort.InferenceSession(
+                str(model_path), providers=["CPUExecutionProvider"]
+            )
+    float_types = {"tensor(float)": np.float32, "tensor(float16)": np.float16}
+    inputs = {}
+    for model_input in session.get_inputs():
+        value = feed[model_input.name]
+        if model_input.type in float_types:
+            value = value.astype(float_types[model_input.type])
+        inputs[model_input.name] = value
+    return [output.astype(np.float32) for output in session.run(None, inputs)]
+
+
+def outputs_within_tolerance(actual_outputs: list, expected_outputs: list) -> bool:
+    """
+    Check that converted model outputs stay close to the reference outputs.
+
+    Errors are compared per output channel (axis 1) against that channel's
+    largest magnitude, so box coordinates in pixels and scores in [0, 1] are
+    each held to a tolerance that FP16 precision can meet.
+
+    Args:
+        actual_outputs (list): Outputs of the converted model.
+        expected_outputs (list): Outputs of the FP32 model.
+
+    Returns:
+        bool: True if every output is within tolerance.
+    """
+    import numpy as np
+
+    for actual, expected in zip(actual_outputs, expected_outputs):
+        actual = np.asarray(actual, dtype=np.float32)
+        expected = np.asarray(expected, dtype=np.float32)
+        axes = tuple(axis for axis in range(expected.ndim) if axis != 1)
+        scale = np.max(np.abs(expected), axis=axes or None, keepdims=True)
+        # Written as "not all within" so NaN or inf outputs fail the check
+        if not np.all(np.abs(actual - expected) <= FP16_RTOL * scale + FP16_ATOL):
+            return False
+    return True
+
+
+def cast_io_to_float32(model: onnx.ModelProto) -> None:
+    """
+    Give an FP16 model float32 inputs and outputs by casting at the graph edges.
+
+    This matches what convert_float_to_float16 does for keep_io_types, for
+    models converted without it.
+
+    Args:
+        model (onnx.ModelProto): FP16 model, updated in place.
+    """
+    import onnx
+
+    graph = model.graph
+    for graph_input in graph.input:
+        if graph_input.type.tensor_type.elem_type != onnx.TensorProto.FLOAT16:
+            continue
+        name = graph_input.name
+        cast_name = f"{name}_cast_to_float16"
+        for node in graph.node:
+            node.input[:] = [cast_name if x == name else x for x in node.input]
+        graph.node.insert(
+            0,
+            onnx.helper.make_node(
+                "Cast", [name], [cast_name], cast_name, to=onnx.TensorProto.FLOAT16
+            ),
+        )
+        graph_input.type.tensor_type.elem_type = onnx.TensorProto.FLOAT
+
+    for graph_output in graph.output:
+        if graph_output.type.tensor_type.elem_type != onnx.TensorProto.FLOAT16:
+            continue
+        name = graph_output.name
+        float16_name = f"{name}_float16"
+        for node in graph.node:
+            node.input[:] = [float16_name if x == name else x for x in node.input]
+            node.output[:] = [float16_name if x == name else x for x in node.output]
+        graph.node.append(
+            onnx.helper.make_node(
+                "Cast",
+                [float16_name],
+                [name],
+                f"{name}_cast_to_float32",
+                to=onnx.TensorProto.FLOAT,
+            )
+        )
+        graph_output.type.tensor_type.elem_type = onnx.TensorProto.FLOAT
+
+
+def convert_float16(
+    input_path: str,
+    output_path: str,
+    keep_io_types: bool = False,
+    validation_feed: dict | None = None,
+) -> None:
     """
     Convert an ONNX model to FP16 (Float16) precision.
 
+    When a validation feed is given, the FP16 model's outputs are compared
+    against the FP32 model's. If they drift beyond tolerance, the model is
+    converted again with mixed precision, keeping numerically sensitive ops
+    in FP32. If no mixed precision model meets the tolerance either, the
+    error is raised and nothing is saved.
+
     Args:
         input_path (str): Path to the input ONNX model.
         output_path (str): Path where the FP16 model will be saved.
+        keep_io_types (bool): Keep model inputs and outputs as float32.
+        validation_feed (dict | None): Sample inputs used to validate accuracy.
     """
+    import numpy as np
+    import onnx
+    from onnxconverter_common.auto_mixed_precision import (
+        auto_convert_mixed_precision,
+    )
+    from onnxconverter_common.float16 import DEFAULT_OP_BLOCK_LIST
+    from onnxmltools.utils.float16_converter import convert_float_to_float16
+
     input_path = Path(input_path)
     output_path = Path(output_path)
 
@@ -20,53 +809,299 @@ def convert_float16(input_path: str, output_path: str) -> None:
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    try:
-        print("Converting model to FP16...")
+    print("Converting model to FP16...")
+
+    # Fuse the FP32 graph first so FP16 casts are inserted around the fused ops
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        optimized_path = Path(tmp_dir) / f"{input_path.stem}_optimized.onnx"
+        optimize_onnx_model(str(input_path), str(optimized_path))
+        large_model = is_large_model(str(optimized_path))
+        # Typed value_info lets the converter cast only at real type boundaries.
+        # Inference runs from file, as models over 2 GiB can't be passed in memory.
+        onnx.shape_inference.infer_shapes_path(
+            str(optimized_path), str(optimized_path), data_prop=True
+        )
+        model = onnx.load(str(optimized_path))
 
-        # Load the model
-        model = onnx.load(str(input_path))
+    if validation_feed is not None:
+        if not keep_io_types:
+            # The FP16 model only ever sees FP16-rounded inputs, so compare it
+            # against an FP32 run on the same rounded inputs
+            float_inputs = {
+                model_input.name
+                for model_input in model.graph.input
+                if model_input.type.tensor_type.elem_type == onnx.TensorProto.FLOAT
+            }
+            validation_feed = {
+                name: (
+                    value.astype(np.float16).astype(np.float32)
+                    if name in float_inputs
+                    else value
+                )
+                for name, value in validation_feed.items()
+            }
+        expected_outputs = run_model(model, validation_feed)
 
-        # Convert model to FP16
-        model_fp16 = convert_float_to_float16(
+    # Convert model to FP16
+    model_fp16 = convert_float_to_float16(
+        model,
+        keep_io_types=keep_io_types,
+        # The converter's own shape inference is in memory and fails over 2 GiB
+        disable_shape_infer=large_model,
+        op_block_list=DEFAULT_OP_BLOCK_LIST + FP16_OP_BLOCK_LIST,
+    )
+
+    if validation_feed is not None and not outputs_within_tolerance(
+        run_model(model_fp16, validation_feed), expected_outputs
+    ):
+        if large_model:
+            raise ValueError(
+                "FP16 outputs exceed tolerance, and mixed precision conversion "
+                "does not support models over 2 GiB"
+            )
+        print("FP16 outputs exceed tolerance, falling back to mixed precision...")
+        # The converter fails with keep_io_types when a node it keeps in FP32
+        # produces a graph output, so the float32 casts are added afterwards
+        model_fp16 = auto_convert_mixed_precision(
             model,
-            keep_io_types=True,  # Keep input/output as float32
-            disable_shape_infer=True  # Disable shape inference for better compatibility
+            validation_feed,
+            validate_fn=lambda expected, actual: outputs_within_tolerance(
+                actual, expected
+            ),
+            keep_io_types=False,
         )
+        if keep_io_types:
+            cast_io_to_float32(model_fp16)
 
-        # Save the converted model
-        onnx.save(model_fp16, str(output_path))
+    # Save the converted model
+    save_model(model_fp16, str(output_path))
+
+    original_bytes = model_size_bytes(str(input_path))
+    converted_bytes = model_size_bytes(str(output_path))
+    io_type = onnx.helper.tensor_dtype_to_np_dtype(
+        model_fp16.graph.input[0].type.tensor_type.elem_type
+    )
 
-        original_size = input_path.stat().st_size / (1024 * 1024)
-        converted_size = output_path.stat().st_size / (1024 * 1024)
+    print(f"\nConversion Results:")
+    print(f"Model converted and saved to: {output_path}")
+    print(f"Model input/output type: {io_type}")
+    print(f"Original model size: {original_bytes / MB:.2f} MB")
+    print(f"FP16 model size: {converted_bytes / MB:.2f} MB")
+    print(f"Size reduction: {100 - converted_bytes * 100 // original_bytes}%")
+
+
+def convert_model(
+    input_path: str,
+    output_path: str,
+    dtype: str,
+    calibration_dir: str | None = None,
+    keep_io_types: bool = False,
+    mixed_precision: bool = False,
+    target_cpu: str = "avx2",
+    backend: str = "ort",
+    validation_input: str | None = None,
+) -> None:
+    """
+    Convert a single model to the requested precision.
+
+    Args:
+        input_path (str): Path to the input ONNX model.
+        output_path (str): Path where the converted model will be saved.
+        dtype (str): Target precision, one of "fp16", "int8" or "fp8".
+        calibration_dir (str | None): Folder containing calibration images.
+        keep_io_types (bool): Keep FP16 model inputs and outputs as float32.
+        mixed_precision (bool): Validate FP16 accuracy on a calibration image and
+            fall back to mixed precision if it is out of tolerance.
+        target_cpu (str): CPU the INT8 model will run on. Only "vnni" CPUs
+            can use the full 8-bit weight range without saturating.
+        backend (str): "ort" for an ONNX model, "trt" for a TensorRT engine.
+        validation_input (str | None): `.npz` file of sample inputs keyed by
+            input name, used like mixed_precision instead of an image.
+    """
+    if backend == "trt":
+        build_trt_int8_engine(input_path, output_path, calibration_dir)
+        return
 
-        print(f"\nConversion Results:")
-        print(f"Model converted and saved to: {output_path}")
-        print(f"Original model size: {original_size:.2f} MB")
-        print(f"FP16 model size: {converted_size:.2f} MB")
-        print(
-            f"Size reduction: {((original_size - converted_size) / original_size * 100):.2f}%"
+    if dtype in ("int8", "fp8"):
+        quantize_onnx_model(
+            input_path,
+            output_path,
+            calibration_dir,
+            reduce_range=target_cpu != "vnni",
+            dtype=dtype,
         )
+        return
 
-    except PermissionError:
-        print(f"Error: Unable to write to {output_path}")
+    validation_feed = None
+    if validation_input is not None:
+        import numpy as np
+
+        with np.load(validation_input) as validation_data:
+            validation_feed = dict(validation_data)
+    elif mixed_precision:
+        validation_feed = ImageCalibrationDataReader(
+            calibration_dir, input_path
+        ).get_next()
+    convert_float16(input_path, output_path, keep_io_types, validation_feed)
+
+
+def report_error(input_path: str, error: Exception) -> None:
+    """
+    Print a conversion error for the given model.
+
+    Args:
+        input_path (str): Path to the model that failed.
+        error (Exception): The raised exception.
+    """
+    if isinstance(error, PermissionError):
+        print(f"Error: Unable to write to {error.filename}")
         print("Please check file permissions and try again")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error during conversion: {str(e)}")
-        sys.exit(1)
+    else:
+        print(f"Error converting {input_path}: {str(error)}")
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Convert ONNX model to FP16")
+    parser = argparse.ArgumentParser(
+        description="Convert ONNX model to FP16, INT8 or FP8"
+    )
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument("--input", type=str, help="Input ONNX model path")
+    input_group.add_argument(
+        "--inputs", type=str, nargs="+", help="Input ONNX model paths (batch mode)"
+    )
+    parser.add_argument("--output", type=str, help="Output converted model path")
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Output folder for converted models (batch mode)",
+    )
+    parser.add_argument(
+        "--dtype",
+        type=str,
+        choices=["fp16", "int8", "fp8"],
+        default="fp16",
+        help="Target precision (default: fp16)",
+    )
     parser.add_argument(
-        "--input", type=str, required=True, help="Input ONNX model path"
+        "--calibration-dir",
+        type=str,
+        help="Folder of calibration images "
+        "(required for int8, fp8 and --mixed-precision)",
     )
     parser.add_argument(
-        "--output", type=str, required=True, help="Output FP16 model path"
+        "--keep-io-types",
+        action="store_true",
+        help="Keep FP16 model inputs and outputs as float32",
+    )
+    parser.add_argument(
+        "--mixed-precision",
+        action="store_true",
+        help="Validate FP16 on a calibration image, falling back to mixed precision",
+    )
+    parser.add_argument(
+        "--validation-input",
+        type=str,
+        help="Validate FP16 on inputs from an .npz file, "
+        "falling back to mixed precision",
+    )
+    parser.add_argument(
+        "--target-cpu",
+        type=str,
+        choices=["vnni", "avx512", "avx2"],
+        default="avx2",
+        help="CPU the INT8 model will run on; selects reduce_range (default: avx2)",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=["ort", "trt"],
+        default="ort",
+        help="Output an ONNX Runtime model or a TensorRT INT8 engine (default: ort)",
     )
 
     args = parser.parse_args()
-    convert_float16(args.input, args.output)
+    if args.input is not None:
+        if args.output is None:
+            parser.error("--output is required with --input")
+        if args.output_dir is not None:
+            parser.error("--output-dir only applies to --inputs, use --output")
+    else:
+        if args.output is not None:
+            parser.error("--output only applies to --input, use --output-dir")
+        if args.output_dir is None:
+            parser.error("--output-dir is required with --inputs")
+    if args.backend == "trt" and args.dtype != "int8":
+        parser.error("--backend trt only supports --dtype int8")
+    if args.mixed_precision or args.validation_input is not None:
+        if args.dtype != "fp16" or args.backend == "trt":
+            parser.error(
+                "--mixed-precision and --validation-input only apply to fp16 "
+                "conversion with the ort backend"
+            )
+    if args.calibration_dir is None:
+        if args.dtype in ("int8", "fp8"):
+            parser.error(f"--calibration-dir is required when --dtype is {args.dtype}")
+        if args.mixed_precision and args.validation_input is None:
+            parser.error("--calibration-dir is required with --mixed-precision")
+
+    options = {
+        "dtype": args.dtype,
+        "calibration_dir": args.calibration_dir,
+        "keep_io_types": args.keep_io_types,
+        "mixed_precision": args.mixed_precision,
+        "target_cpu": args.target_cpu,
+        "backend": args.backend,
+        "validation_input": args.validation_input,
+    }
+
+    if args.input is not None:
+        try:
+            convert_model(args.input, args.output, **options)
+        except Exception as e:
+            report_error(args.input, e)
+            sys.exit(1)
+        return
+
+    # Outputs are named after the input stem, so inputs sharing a stem would
+    # overwrite each other's output
+    output_dir = Path(args.output_dir)
+    output_suffix = ".engine" if args.backend == "trt" else ".onnx"
+    output_paths = {}
+    for input_path in args.inputs:
+        output_path = (
+            output_dir / f"{Path(input_path).stem}_{args.dtype}{output_suffix}"
+        )
+        if output_path in output_paths:
+            parser.error(
+                f"{output_paths[output_path]} and {input_path} would both be "
+                f"written to {output_path}"
+            )
+        output_paths[output_path] = input_path
+
+    # Each conversion already uses ONNX Runtime's intra-op threads, so only
+    # use half the cores for workers to avoid oversubscription
+    max_workers = min(len(args.inputs), max(1, (os.cpu_count() or 2) // 2))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (
+                input_path,
+                executor.submit(convert_model, input_path, str(output_path), **options),
+            )
+            for output_path, input_path in output_paths.items()
+        ]
+
+        # A failed model doesn't stop the rest of the batch
+        failed = []
+        for input_path, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                report_error(input_path, e)
+                failed.append(input_path)
+
+    if failed:
+        print(f"\n{len(failed)} of {len(args.inputs)} models failed to convert")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
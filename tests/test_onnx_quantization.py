@@ -0,0 +1,339 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+onnx = pytest.importorskip("onnx")
+ort = pytest.importorskip("onnxruntime")
+
+ROOT = Path(__file__).resolve().parent.parent
+MODEL_DIR = ROOT / "models"
+IMAGE_DIR = ROOT / "example" / "image"
+
+spec = importlib.util.spec_from_file_location(
+    "onnx_quantization", ROOT / "scripts" / "onnx_quantization.py"
+)
+onnx_quantization = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(onnx_quantization)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(onnx_quantization, "CACHE_DIR", cache_dir)
+    return cache_dir
+
+
+def run_on_image(model_path: Path) -> list:
+    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    feed = onnx_quantization.ImageCalibrationDataReader(
+        str(IMAGE_DIR), str(model_path)
+    ).get_next()
+    model_input = session.get_inputs()[0]
+    if model_input.type == "tensor(float16)":
+        feed = {name: value.astype(np.float16) for name, value in feed.items()}
+    return session.run(None, feed)
+
+
+def test_quantize_int8_smoke(tmp_path):
+    model_path = MODEL_DIR / "yolo11n_9ir_128_haface.onnx"
+    output_path = tmp_path / "quantized.onnx"
+
+    onnx_quantization.quantize_onnx_model(
+        str(model_path), str(output_path), str(IMAGE_DIR)
+    )
+
+    expected = run_on_image(model_path)
+    actual = run_on_image(output_path)
+    assert [output.shape for output in actual] == [output.shape for output in expected]
+
+    graph = onnx.load(str(output_path)).graph
+    initializers = {tensor.name: tensor for tensor in graph.initializer}
+    producers = {output: node for node in graph.node for output in node.output}
+    consumers = {}
+    for node in graph.node:
+        for name in node.input:
+            consumers.setdefault(name, []).append(node)
+    op_types = {node.op_type for node in graph.node}
+    assert {"QuantizeLinear", "DequantizeLinear"} <= op_types
+
+    weight_dequantizers = [
+        node
+        for node in graph.node
+        if node.op_type == "DequantizeLinear" and node.input[0] in initializers
+    ]
+    assert weight_dequantizers
+    for node in weight_dequantizers:
+        assert {consumer.op_type for consumer in consumers[node.output[0]]} <= set(
+            onnx_quantization.OP_TYPES_TO_QUANTIZE
+        )
+        # Per-channel weights carry one scale per output channel
+        assert len(initializers[node.input[1]].dims) == 1
+
+    # Elementwise ops stay in float: none is wrapped in a DQ -> op -> Q group
+    # that ONNX Runtime would fuse into a quantized kernel
+    for node in graph.node:
+        if node.op_type not in ("Add", "Mul"):
+            continue
+        assert not (
+            all(
+                name in producers and producers[name].op_type == "DequantizeLinear"
+                for name in node.input
+            )
+            and all(
+                consumer.op_type == "QuantizeLinear"
+                for consumer in consumers.get(node.output[0], [])
+            )
+        ), node.name
+
+
+def test_quantize_int8_external_data(tmp_path, monkeypatch):
+    # Treat every model as over the protobuf limit to exercise that path
+    monkeypatch.setattr(onnx_quantization, "MAX_PROTOBUF_BYTES", 1024)
+    model_path = MODEL_DIR / "yolo11n_9ir_128_haface.onnx"
+    output_path = tmp_path / "quantized.onnx"
+
+    onnx_quantization.quantize_onnx_model(
+        str(model_path), str(output_path), str(IMAGE_DIR)
+    )
+
+    assert output_path.with_suffix(".onnx.data").is_file()
+    assert onnx_quantization.model_size_bytes(str(output_path)) > (
+        output_path.stat().st_size
+    )
+    expected = run_on_image(model_path)
+    actual = run_on_image(output_path)
+    assert [output.shape for output in actual] == [output.shape for output in expected]
+
+
+def test_outputs_within_tolerance_scales_per_channel():
+    # Channel 0 holds pixel coordinates, channel 1 scores in [0, 1]
+    expected = np.array([[[320.0, 640.0], [0.5, 0.9]]], dtype=np.float32)
+
+    assert onnx_quantization.outputs_within_tolerance(
+        [expected + [[[3.0, -3.0], [0.005, -0.005]]]], [expected]
+    )
+    # An error that is small for coordinates is too large for scores
+    assert not onnx_quantization.outputs_within_tolerance(
+        [expected + [[[0.0, 0.0], [3.0, 0.0]]]], [expected]
+    )
+    assert not onnx_quantization.outputs_within_tolerance(
+        [expected + [[[10.0, 0.0], [0.0, 0.0]]]], [expected]
+    )
+
+
+def test_outputs_within_tolerance_rejects_nan():
+    expected = np.ones((1, 2, 2), dtype=np.float32)
+    actual = expected.copy()
+    actual[0, 1, 1] = np.nan
+
+    assert not onnx_quantization.outputs_within_tolerance([actual], [expected])
+
+
+def test_convert_float16_raises_when_fallback_fails(tmp_path, monkeypatch):
+    auto_mixed_precision = pytest.importorskip(
+        "onnxconverter_common.auto_mixed_precision"
+    )
+    pytest.importorskip("onnxmltools")
+
+    def fail(*args, **kwargs):
+        raise ValueError("validation failed for final fp16 model")
+
+    # A negative tolerance rejects the FP16 model outright
+    monkeypatch.setattr(onnx_quantization, "FP16_ATOL", -1.0)
+    monkeypatch.setattr(auto_mixed_precision, "auto_convert_mixed_precision", fail)
+    model_path = MODEL_DIR / "yolo11n_9ir_128_haface.onnx"
+    output_path = tmp_path / "fp16.onnx"
+    validation_feed = onnx_quantization.ImageCalibrationDataReader(
+        str(IMAGE_DIR), str(model_path)
+    ).get_next()
+
+    with pytest.raises(ValueError, match="final fp16 model"):
+        onnx_quantization.convert_float16(
+            str(model_path), str(output_path), validation_feed=validation_feed
+        )
+
+    assert not output_path.exists()
+
+
+@pytest.mark.parametrize("keep_io_types", [False, True])
+def test_convert_float16_mixed_precision(tmp_path, keep_io_types):
+    pytest.importorskip("onnxmltools")
+    model_path = MODEL_DIR / "yolo11n_640_hface.onnx"
+    output_path = tmp_path / "fp16.onnx"
+    validation_feed = onnx_quantization.ImageCalibrationDataReader(
+        str(IMAGE_DIR), str(model_path)
+    ).get_next()
+
+    onnx_quantization.convert_float16(
+        str(model_path), str(output_path), keep_io_types, validation_feed
+    )
+
+    expected = run_on_image(model_path)
+    actual = run_on_image(output_path)
+    assert [output.shape for output in actual] == [output.shape for output in expected]
+    assert onnx_quantization.outputs_within_tolerance(actual, expected)
+
+
+def count_float32_nodes(model_path: Path) -> int:
+    graph = onnx.shape_inference.infer_shapes(onnx.load(str(model_path))).graph
+    float32_tensors = {
+        value.name
+        for value in [*graph.value_info, *graph.output]
+        if value.type.tensor_type.elem_type == onnx.TensorProto.FLOAT
+    }
+    return sum(
+        node.op_type != "Cast" and node.output[0] in float32_tensors
+        for node in graph.node
+    )
+
+
+@pytest.mark.parametrize("keep_io_types", [False, True])
+def test_convert_float16_falls_back_to_mixed_precision(
+    tmp_path, monkeypatch, keep_io_types
+):
+    pytest.importorskip("onnxmltools")
+    # Plain FP16 misses this tolerance on the score channel
+    monkeypatch.setattr(onnx_quantization, "FP16_RTOL", 3e-3)
+    model_path = MODEL_DIR / "yolo11n_9ir_128_haface.onnx"
+    fp16_path = tmp_path / "fp16.onnx"
+    mixed_path = tmp_path / "mixed.onnx"
+    validation_feed = onnx_quantization.ImageCalibrationDataReader(
+        str(IMAGE_DIR), str(model_path)
+    ).get_next()
+
+    onnx_quantization.convert_float16(str(model_path), str(fp16_path), keep_io_types)
+    onnx_quantization.convert_float16(
+        str(model_path), str(mixed_path), keep_io_types, validation_feed
+    )
+
+    # The models see FP16-rounded inputs, so the reference does too
+    feed = {
+        name: value.astype(np.float16).astype(np.float32)
+        for name, value in validation_feed.items()
+    }
+    expected = onnx_quantization.run_model(onnx.load(str(model_path)), feed)
+    assert not onnx_quantization.outputs_within_tolerance(
+        onnx_quantization.run_model(onnx.load(str(fp16_path)), feed), expected
+    )
+    assert onnx_quantization.outputs_within_tolerance(
+        onnx_quantization.run_model(onnx.load(str(mixed_path)), feed), expected
+    )
+    assert count_float32_nodes(mixed_path) > count_float32_nodes(fp16_path)
+    session = ort.InferenceSession(str(mixed_path), providers=["CPUExecutionProvider"])
+    io_type = "tensor(float)" if keep_io_types else "tensor(float16)"
+    assert session.get_inputs()[0].type == io_type
+    assert session.get_outputs()[0].type == io_type
+
+
+def make_model(tmp_path: Path, nodes: list, output_shape: tuple = (1, 3)) -> Path:
+    graph = onnx.helper.make_graph(
+        nodes,
+        "graph",
+        [onnx.helper.make_tensor_value_info("x", onnx.TensorProto.FLOAT, [1, 3])],
+        [onnx.helper.make_tensor_value_info("y", onnx.TensorProto.FLOAT, output_shape)],
+    )
+    model = onnx.helper.make_model(
+        graph, opset_imports=[onnx.helper.make_opsetid("", 17)]
+    )
+    model_path = tmp_path / "model.onnx"
+    onnx.save(model, str(model_path))
+    return model_path
+
+
+@pytest.fixture
+def convert_version_calls(monkeypatch):
+    calls = []
+    convert_version = onnx.version_converter.convert_version
+
+    def spy(model, target_version):
+        calls.append(target_version)
+        return convert_version(model, target_version)
+
+    monkeypatch.setattr(onnx.version_converter, "convert_version", spy)
+    return calls
+
+
+def opset_version(model_path: str) -> int:
+    return onnx.load(model_path).opset_import[0].version
+
+
+def test_update_model_opset_patches_unchanged_ops(
+    tmp_path, cache_dir, convert_version_calls
+):
+    model_path = make_model(
+        tmp_path,
+        [
+            onnx.helper.make_node("Relu", ["x"], ["r"]),
+            onnx.helper.make_node("Add", ["r", "x"], ["y"]),
+        ],
+    )
+
+    updated_path = onnx_quantization.update_model_opset(str(model_path))
+
+    assert Path(updated_path).parent == cache_dir
+    assert opset_version(updated_path) == onnx_quantization.TARGET_OPSET
+    assert convert_version_calls == []
+
+    mtime = Path(updated_path).stat().st_mtime_ns
+    assert onnx_quantization.update_model_opset(str(model_path)) == updated_path
+    assert Path(updated_path).stat().st_mtime_ns == mtime
+
+
+def test_update_model_opset_converts_changed_ops(tmp_path, convert_version_calls):
+    # ReduceMean moved axes from an attribute to an input in opset 18
+    model_path = make_model(
+        tmp_path,
+        [onnx.helper.make_node("ReduceMean", ["x"], ["y"], axes=[1])],
+        output_shape=(1, 1),
+    )
+
+    updated_path = onnx_quantization.update_model_opset(str(model_path))
+
+    assert convert_version_calls == [onnx_quantization.TARGET_OPSET]
+    assert opset_version(updated_path) == onnx_quantization.TARGET_OPSET
+    (node,) = [
+        node
+        for node in onnx.load(updated_path).graph.node
+        if node.op_type == "ReduceMean"
+    ]
+    assert len(node.input) == 2
+
+
+def test_update_model_opset_removes_invalid_model(tmp_path, cache_dir):
+    model_path = make_model(
+        tmp_path, [onnx.helper.make_node("Add", ["x", "undefined"], ["y"])]
+    )
+
+    with pytest.raises(onnx.checker.ValidationError):
+        onnx_quantization.update_model_opset(str(model_path))
+
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_run_model_only_casts_float_inputs():
+    graph = onnx.helper.make_graph(
+        [
+            onnx.helper.make_node(
+                "Cast", ["offset"], ["offset_float"], to=onnx.TensorProto.FLOAT
+            ),
+            onnx.helper.make_node("Add", ["x", "offset_float"], ["y"]),
+        ],
+        "graph",
+        [
+            onnx.helper.make_tensor_value_info("x", onnx.TensorProto.FLOAT, [2]),
+            onnx.helper.make_tensor_value_info("offset", onnx.TensorProto.INT64, [2]),
+        ],
+        [onnx.helper.make_tensor_value_info("y", onnx.TensorProto.FLOAT, [2])],
+    )
+    model = onnx.helper.make_model(
+        graph, opset_imports=[onnx.helper.make_opsetid("", 17)]
+    )
+
+    (output,) = onnx_quantization.run_model(
+        model, {"x": np.array([0.5, 1.5]), "offset": np.array([1, 2])}
+    )
+
+    np.testing.assert_array_equal(output, [1.5, 3.5])